@@ -1,8 +1,13 @@
 import streamlit as st
-import requests
-import pandas as pd
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from concurrent.futures import ThreadPoolExecutor, as_completed
+# requests, pandas and orjson are imported inside the functions that
+# use them, so the "set your API key" path starts without loading them.
 from datetime import datetime
 import math
+import random
+import re
+import threading
 
 # Set page config
 st.set_page_config(
@@ -18,11 +23,165 @@ st.set_page_config(
 OPENSEA_API_KEY = "YOUR_OPENSEA_API_KEY"
 OPENSEA_API_BASE = "https://api.opensea.io/api/v2"
 
+# Endpoint URL templates, filled in with str.format(slug=...)
+COLLECTION_STATS_URL = OPENSEA_API_BASE + "/collections/{slug}/stats"
+COLLECTION_EVENTS_URL = OPENSEA_API_BASE + "/events/collection/{slug}"
+COLLECTION_ASSETS_URL = OPENSEA_API_BASE + "/assets/collection/{slug}"
+
+# Public IPFS gateways, tried in order until one serves the image
+IPFS_GATEWAYS = [
+    "https://ipfs.io/ipfs/",
+    "https://dweb.link/ipfs/",
+    "https://nftstorage.link/ipfs/"
+]
+
+# Matches ipfs://<cid>/... links, including the legacy ipfs://ipfs/<cid> form
+IPFS_URL_PATTERN = re.compile(r"^ipfs://(?:ipfs/)?(.+)$")
+
+# Images larger than this aren't downloaded or cached; the browser loads them from the URL
+MAX_IMAGE_BYTES = 2 * 1024 * 1024
+
 # You can also use an environment variable for more security:
 import os
 # OPENSEA_API_KEY = os.getenv("OPENSEA_API_KEY", OPENSEA_API_KEY) # Uncomment to use environment variable
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+@st.cache_resource
+def get_http_session():
+    """
+    Build a shared HTTP session with a keep-alive connection pool
+    
+    Streamlit re-executes this script on every interaction, so the session is
+    held with st.cache_resource to keep connections to OpenSea open across reruns.
+    Server errors (5xx) and timeouts are retried by urllib3 with a short
+    exponential backoff. Rate limits (429) are not retried, and Retry-After is
+    not honoured: it can ask for a wait of minutes, so the callers' rate-limit
+    messages are shown instead.
+    
+    Returns:
+        requests.Session: Session shared by all OpenSea calls
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=10,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=1,
+            status_forcelist=[500, 502, 503, 504],
+            respect_retry_after_header=False,
+            raise_on_status=False
+        )
+    )
+    session.mount("https://", adapter)
+    session.headers.update({
+        "Accept": "application/json",
+        "User-Agent": "NFT-Dashboard/1.0"
+    })
+    return session
+
+@st.cache_resource
+def get_image_session():
+    """
+    Build a shared HTTP session for image downloads
+    
+    Images are spread over several hosts (IPFS gateways, CDNs), so the pool is
+    larger than for the API. Retries are disabled because a failing gateway is
+    handled by moving on to the next one.
+    
+    Returns:
+        requests.Session: Session used for all image requests
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=0)
+    session.mount("https://", adapter)
+    session.headers.update({
+        "Accept": "image/*",
+        "User-Agent": "NFT-Dashboard/1.0"
+    })
+    return session
+
+@st.cache_resource
+def get_etag_store():
+    """
+    Shared store of the last ETag and parsed payload seen per OpenSea request
+    
+    The store is shared by every session and by the fetcher threads, so it
+    comes with a lock that must be held while reading or changing it.
+    
+    Returns:
+        tuple: (dict mapping (url, params) to (etag, parsed JSON), threading.Lock)
+    """
+    return {}, threading.Lock()
+
+def get_opensea_json(url, api_key, params=None, timeout=30):
+    """
+    GET an OpenSea endpoint, revalidating against the last ETag seen for it
+    
+    When a previous response carried an ETag it is sent back as If-None-Match;
+    a 304 reply reuses the payload parsed last time instead of downloading and
+    parsing it again.
+    
+    Args:
+        url (str): Endpoint URL
+        api_key (str): OpenSea API key
+        params (dict): Query parameters
+        timeout (int): Request timeout in seconds
+    
+    Returns:
+        tuple: (response, parsed JSON or None if the request didn't succeed)
+    """
+    import orjson
+    
+    store, lock = get_etag_store()
+    key = (url, tuple(sorted((params or {}).items())))
+    with lock:
+        previous = store.get(key)
+    
+    headers = {"X-API-KEY": api_key}
+    if previous:
+        headers["If-None-Match"] = previous[0]
+    
+    response = get_http_session().get(url, headers=headers, params=params, timeout=timeout)
+    
+    if response.status_code == 304 and previous:
+        return response, previous[1]
+    if not response.ok:
+        return response, None
+    
+    data = orjson.loads(response.content)
+    etag = response.headers.get("ETag")
+    if etag:
+        with lock:
+            # Keep the store bounded; dicts preserve insertion order, so drop the oldest
+            if key not in store and len(store) >= 128:
+                store.pop(next(iter(store)), None)
+            store[key] = (etag, data)
+    return response, data
+
+@st.cache_resource(show_spinner=False)
+def jittered_ttl(base_seconds):
+    """
+    Spread a cache TTL by up to ±10% so cached endpoints don't all expire together
+    
+    The value is picked once per server process (st.cache_resource), because a
+    TTL that changed on every rerun would reset the data cache each time.
+    
+    Args:
+        base_seconds (int): Nominal TTL in seconds
+    
+    Returns:
+        int: Jittered TTL in seconds
+    """
+    return int(base_seconds * random.uniform(0.9, 1.1))
+
+@st.cache_data(ttl=jittered_ttl(300), max_entries=64, show_spinner=False)  # Cache for ~5 minutes
 def get_collection_stats(slug, api_key):
     """
     Fetch collection statistics from OpenSea API v2
@@ -34,6 +193,8 @@ def get_collection_stats(slug, api_key):
     Returns:
         dict: Collection statistics or None if error
     """
+    import requests
+    
     if api_key == "YOUR_OPENSEA_API_KEY":
         st.error("⚠️ Please set your OpenSea API key. Check the sidebar for instructions.")
         return None
@@ -41,16 +202,10 @@ def get_collection_stats(slug, api_key):
     # Debug print for API key (masked)
     # print(f"Using API Key (masked): {api_key[:4]}...{api_key[-4:]}")
 
-    url = f"{OPENSEA_API_BASE}/collections/{slug}/stats"
-    
-    headers = {
-        "X-API-KEY": api_key,
-        "Accept": "application/json",
-        "User-Agent": "NFT-Dashboard/1.0"
-    }
+    url = COLLECTION_STATS_URL.format(slug=slug)
     
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response, data = get_opensea_json(url, api_key, timeout=10)
         
         if response.status_code == 401:
             st.error("🚫 Invalid API key. Please check your OpenSea API key.")
@@ -64,8 +219,6 @@ def get_collection_stats(slug, api_key):
         
         response.raise_for_status()
         
-        data = response.json()
-        
         # Extract the main stats from the response
         if 'total' in data:
             return {
@@ -88,7 +241,7 @@ def get_collection_stats(slug, api_key):
         st.error(f"💥 Unexpected error: {str(e)}")
         return None
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+@st.cache_data(ttl=jittered_ttl(60), max_entries=64, show_spinner=False)  # Cache for ~1 minute, sales change quickly
 def get_recent_sales(slug, api_key):
     """
     Fetch recent sales events for a collection
@@ -98,18 +251,15 @@ def get_recent_sales(slug, api_key):
         api_key (str): OpenSea API key
     
     Returns:
-        pd.DataFrame: Recent sales data or None if error
+        pd.DataFrame: Recent sales data (with a numeric '_price_eth' column, NaN where the price is unknown) or None if error
     """
+    import pandas as pd
+    import requests
+    
     if api_key == "YOUR_OPENSEA_API_KEY":
         return None
     
-    url = f"{OPENSEA_API_BASE}/events/collection/{slug}"
-    
-    headers = {
-        "X-API-KEY": api_key,
-        "Accept": "application/json",
-        "User-Agent": "NFT-Dashboard/1.0"
-    }
+    url = COLLECTION_EVENTS_URL.format(slug=slug)
     
     params = {
         "event_type": "sale",
@@ -117,7 +267,7 @@ def get_recent_sales(slug, api_key):
     }
     
     try:
-        response = requests.get(url, headers=headers, params=params, timeout=30)
+        response, data = get_opensea_json(url, api_key, params=params, timeout=30)
         
         if response.status_code == 401:
             return None
@@ -129,50 +279,35 @@ def get_recent_sales(slug, api_key):
         
         response.raise_for_status()
         
-        data = response.json()
-        
         if 'asset_events' in data and data['asset_events']:
             # Convert to DataFrame
-            df = pd.DataFrame(data['asset_events'])
+            df = pd.DataFrame(data['asset_events']).reindex(
+                columns=['asset', 'payment_token', 'total_price', 'event_timestamp']
+            )
             
-            # Extract relevant columns
-            processed_data = []
-            for _, event in df.iterrows():
-                try:
-                    # Convert price from Wei to ETH
-                    total_price = float(event.get('total_price', 0)) / (10**18)
-                    
-                    # Get NFT name and ID
-                    if 'asset' in event and event['asset']:
-                        nft_name = event['asset'].get('name', 'Unknown')
-                        nft_id = event['asset'].get('identifier', 'Unknown')
-                    else:
-                        nft_name = 'Unknown'
-                        nft_id = 'Unknown'
-                    
-                    # Get payment token
-                    payment_token = event.get('payment_token', {}).get('symbol', 'ETH')
-                    
-                    # Format timestamp
-                    timestamp = event.get('event_timestamp', '')
-                    if timestamp:
-                        try:
-                            formatted_time = datetime.fromisoformat(timestamp.replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M:%S')
-                        except:
-                            formatted_time = timestamp
-                    else:
-                        formatted_time = 'Unknown'
-                    
-                    processed_data.append({
-                        'NFT Name': nft_name,
-                        'Token ID': nft_id,
-                        'Price': f"{total_price:.4f} {payment_token}",
-                        'Timestamp': formatted_time
-                    })
-                except Exception as e:
-                    continue
+            # Flatten nested NFT and payment token fields (missing objects become empty);
+            # token IDs can arrive as strings or numbers, so display them all as text
+            asset = pd.json_normalize(
+                [a if isinstance(a, dict) else {} for a in df['asset']], max_level=0
+            ).reindex(columns=['name', 'identifier']).fillna('Unknown').astype(str)
+            token = pd.json_normalize(
+                [t if isinstance(t, dict) else {} for t in df['payment_token']], max_level=0
+            ).reindex(columns=['symbol'])['symbol'].fillna('ETH')
+            
+            # Convert price from Wei to ETH; unparseable prices stay NaN so the average skips them
+            price_eth = pd.to_numeric(df['total_price'], errors='coerce') / 1e18
+            
+            # Format timestamp (ISO8601 accepts 'Z' and optional fractional seconds on any row)
+            ts = pd.to_datetime(df['event_timestamp'], format='ISO8601', errors='coerce', utc=True)
+            formatted_time = ts.dt.strftime('%Y-%m-%d %H:%M:%S').fillna('Unknown')
             
-            return pd.DataFrame(processed_data)
+            return pd.DataFrame({
+                'NFT Name': asset['name'],
+                'Token ID': asset['identifier'],
+                'Price': (price_eth.map('{:.4f}'.format) + ' ' + token.astype(str)).where(price_eth.notna(), 'Unknown'),
+                'Timestamp': formatted_time,
+                '_price_eth': price_eth
+            })
         else:
             return pd.DataFrame()
             
@@ -186,7 +321,45 @@ def get_recent_sales(slug, api_key):
         st.warning(f"💥 Error processing sales data: {str(e)}")
         return None
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+@st.cache_data(ttl=jittered_ttl(24 * 3600), max_entries=64, show_spinner=False)  # Cache for ~24 hours, asset metadata rarely changes
+def fetch_collection_assets(slug, api_key, limit=20):
+    """
+    Fetch NFT assets from a collection (cached)
+    
+    Failures (bad API key, rate limit, timeouts, server errors) are raised
+    rather than returned, because st.cache_data doesn't store exceptions and a
+    failure must not be served for the whole TTL. get_collection_assets turns
+    them into messages.
+    
+    Args:
+        slug (str): NFT collection slug
+        api_key (str): OpenSea API key
+        limit (int): Number of assets to fetch
+    
+    Returns:
+        list: List of NFT assets (empty if the collection has none or doesn't exist)
+    """
+    url = COLLECTION_ASSETS_URL.format(slug=slug)
+    
+    params = {
+        "limit": limit,
+        "order_by": "pk",
+        "order_direction": "desc"
+    }
+    
+    response, data = get_opensea_json(url, api_key, params=params, timeout=60)
+    
+    if response.status_code == 404:
+        st.warning(f"❌ Collection '{slug}' not found for assets.")
+        return []
+    
+    response.raise_for_status()
+    
+    if 'nfts' in data and data['nfts']:
+        return data['nfts']
+    else:
+        return []
+
 def get_collection_assets(slug, api_key, limit=20):
     """
     Fetch NFT assets from a collection
@@ -199,66 +372,184 @@ def get_collection_assets(slug, api_key, limit=20):
     Returns:
         list: List of NFT assets or None if error
     """
+    import requests
+    
     if api_key == "YOUR_OPENSEA_API_KEY":
         return None
     
-    url = f"{OPENSEA_API_BASE}/assets/collection/{slug}"
+    try:
+        return fetch_collection_assets(slug, api_key, limit)
+    except requests.exceptions.HTTPError as e:
+        status_code = e.response.status_code if e.response is not None else None
+        if status_code == 401:
+            st.error("🚫 Invalid API key for assets. Please check your OpenSea API key.")
+        elif status_code == 429:
+            st.error("⏰ Rate limit exceeded for assets data. Please wait a moment and try again.")
+        else:
+            st.error(f"🔥 Failed to fetch collection assets: {str(e)}")
+        return None
+    except requests.exceptions.Timeout:
+        st.error("⏱️ Assets data request timed out. Please try again.")
+        return None
+    except requests.exceptions.RequestException as e:
+        st.error(f"🔥 Failed to fetch collection assets: {str(e)}")
+        return None
+    except Exception as e:
+        st.error(f"💥 Error processing assets data: {str(e)}")
+        return None
+
+def asset_card_fields(nft):
+    """
+    Pull the fields shown on an asset card out of an NFT record
     
-    headers = {
-        "X-API-KEY": api_key,
-        "Accept": "application/json",
-        "User-Agent": "NFT-Dashboard/1.0"
-    }
+    Args:
+        nft (dict): NFT record from the assets endpoint
     
-    params = {
-        "limit": limit,
-        "order_by": "pk",
-        "order_direction": "desc"
-    }
+    Returns:
+        tuple: (image URL, display name, token ID, traits list)
+    """
+    get = nft.get  # bind once, the lookups below all go through it
+    token_id = get('identifier', 'Unknown')
+    return get('image_url') or '', get('name') or f"NFT #{token_id}", token_id, get('traits') or []
+
+def resolve_ipfs(url):
+    """
+    Build the list of HTTPS URLs an image can be downloaded from
+    
+    Args:
+        url (str): Image URL from the API
+    
+    Returns:
+        list: Gateway URLs for ipfs:// links, the URL itself otherwise (empty if no URL)
+    """
+    if not url:
+        return []
+    # Cek apakah ini URL IPFS dan ubah ke HTTP Gateway
+    match = IPFS_URL_PATTERN.match(url)
+    if match:
+        ipfs_path = match.group(1)
+        return [gateway + ipfs_path for gateway in IPFS_GATEWAYS]
+    return [url]
+
+@st.cache_data(ttl=3600, max_entries=128, show_spinner=False)  # Cache for 1 hour
+def fetch_image_bytes(candidate_urls):
+    """
+    Download one NFT image, falling back across IPFS gateways
     
-    max_retries = 3
-    for attempt in range(max_retries):
+    Cached per image so reruns and other collections that share an image
+    don't download it again. Failures are raised rather than returned so a
+    brief gateway outage isn't cached for the full hour (image_download_failed
+    remembers them briefly instead); images over MAX_IMAGE_BYTES are refused to
+    keep the cache's memory use bounded.
+    
+    Args:
+        candidate_urls (tuple): Candidate URLs for the image (see resolve_ipfs)
+    
+    Returns:
+        bytes: Image content
+    
+    Raises:
+        ValueError: If the image is too large or no candidate could be downloaded
+    """
+    import requests
+    
+    for url in candidate_urls:
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=60)
-            
-            if response.status_code == 401:
-                st.error("🚫 Invalid API key for assets. Please check your OpenSea API key.")
-                return None
-            elif response.status_code == 404:
-                st.warning(f"❌ Collection '{slug}' not found for assets.")
-                return []
-            elif response.status_code == 429:
-                st.warning(f"⏰ Rate limit exceeded for assets data. Retrying in {2 ** attempt} seconds...")
-                time.sleep(2 ** attempt) # Exponential backoff
-                continue # Retry
-            
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if 'nfts' in data and data['nfts']:
-                return data['nfts']
-            else:
-                return []
+            # Short connect/read timeouts so a stalled gateway quickly falls through to the next
+            with get_image_session().get(url, timeout=(3.05, 5), stream=True) as response:
+                if response.status_code != 200:
+                    continue
+                
+                content_length = response.headers.get("Content-Length")
+                if content_length and content_length.isdigit() and int(content_length) > MAX_IMAGE_BYTES:
+                    raise ValueError(f"Image too large to cache: {url}")
                 
-        except requests.exceptions.Timeout:
-            st.warning(f"⏱️ Assets data request timed out (attempt {attempt + 1}/{max_retries}). Retrying...")
-            time.sleep(2 ** attempt) # Exponential backoff
-            continue # Retry
-        except requests.exceptions.RequestException as e:
-            if e.response is not None and e.response.status_code >= 500:
-                st.warning(f"🚨 Server error {e.response.status_code} (attempt {attempt + 1}/{max_retries}). Retrying in {2 ** attempt} seconds...")
-                time.sleep(2 ** attempt) # Exponential backoff
-                continue # Retry
-            else:
-                st.error(f"🔥 Failed to fetch collection assets: {str(e)}")
-                return None
-        except Exception as e:
-            st.error(f"💥 Error processing assets data: {str(e)}")
+                # Content-Length may be missing, so enforce the cap while reading too
+                content = bytearray()
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    content.extend(chunk)
+                    if len(content) > MAX_IMAGE_BYTES:
+                        raise ValueError(f"Image too large to cache: {url}")
+                return bytes(content)
+        except requests.exceptions.RequestException:
+            continue
+    raise ValueError(f"Image could not be downloaded: {candidate_urls[0]}")
+
+@st.cache_data(ttl=300, max_entries=512, show_spinner=False)  # Cache for 5 minutes
+def image_download_failed(candidate_urls):
+    """
+    Download one NFT image, remembering for a short while if it can't be used
+    
+    fetch_image_bytes doesn't cache failures, so without this a broken or
+    oversized image would be downloaded again on every rerun. A successful
+    download is kept in fetch_image_bytes' own cache.
+    
+    Args:
+        candidate_urls (tuple): Candidate URLs for the image (see resolve_ipfs)
+    
+    Returns:
+        bool: True if the image couldn't be downloaded or is too large
+    """
+    try:
+        fetch_image_bytes(candidate_urls)
+        return False
+    except ValueError:
+        return True
+
+def fetch_images(candidates):
+    """
+    Download NFT images concurrently, yielding each one as soon as it's ready
+    
+    Args:
+        candidates (list): One tuple of candidate URLs per image (see resolve_ipfs)
+    
+    Yields:
+        tuple: (index into candidates, image bytes or None if it wasn't downloaded),
+        in the order the downloads finish
+    """
+    def fetch(urls):
+        # data: URIs (and anything else that isn't http) are rendered from the URL as-is
+        if not urls or not urls[0].startswith(("http://", "https://")):
+            return None
+        if image_download_failed(urls):
+            return None
+        try:
+            # Normally a cache hit; it only downloads again if the entry was evicted meanwhile
+            return fetch_image_bytes(urls)
+        except ValueError:
             return None
     
-    st.error(f"❌ Failed to fetch assets after {max_retries} attempts due to timeout or rate limit.")
-    return None
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=10, initializer=add_script_run_ctx, initargs=(None, ctx)) as executor:
+        futures = {executor.submit(fetch, urls): idx for idx, urls in enumerate(candidates)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+def fetch_collection_data(slug, api_key):
+    """
+    Fetch stats, recent sales and assets for a collection concurrently
+    
+    The three requests are independent, so they run in parallel over the shared
+    connection pool and the total wait is roughly the slowest call instead of
+    the sum of all three. Worker threads are attached to the current script run
+    so errors reported by the fetchers still show up in the app.
+    
+    OpenSea API v2 has no combined or GraphQL endpoint for stats, events and
+    NFTs, so three REST calls (each cached on its own TTL) is the minimum.
+    
+    Args:
+        slug (str): NFT collection slug
+        api_key (str): OpenSea API key
+    
+    Returns:
+        tuple: (stats, recent sales DataFrame, assets list)
+    """
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=3, initializer=add_script_run_ctx, initargs=(None, ctx)) as executor:
+        stats_future = executor.submit(get_collection_stats, slug, api_key)
+        sales_future = executor.submit(get_recent_sales, slug, api_key)
+        assets_future = executor.submit(get_collection_assets, slug, api_key)
+        return stats_future.result(), sales_future.result(), assets_future.result()
 
 # Sidebar for API key configuration
 with st.sidebar:
@@ -304,9 +595,7 @@ tab1, tab2, tab3 = st.tabs(["📊 Key Stats", "📈 Activity", "🖼️ Browse A
 # Fetch data when user provides a slug
 if collection_slug and OPENSEA_API_KEY != "YOUR_OPENSEA_API_KEY":
     with st.spinner(f"Fetching data for '{collection_slug}'..."):
-        stats = get_collection_stats(collection_slug, OPENSEA_API_KEY)
-        recent_sales_df = get_recent_sales(collection_slug, OPENSEA_API_KEY)
-        assets = get_collection_assets(collection_slug, OPENSEA_API_KEY)
+        stats, recent_sales_df, assets = fetch_collection_data(collection_slug, OPENSEA_API_KEY)
     
     # Tab 1: Key Stats
     with tab1:
@@ -354,24 +643,16 @@ if collection_slug and OPENSEA_API_KEY != "YOUR_OPENSEA_API_KEY":
         
         if recent_sales_df is not None and not recent_sales_df.empty:
             st.subheader("Recent Sales")
-            st.dataframe(recent_sales_df, use_container_width=True)
+            st.dataframe(recent_sales_df.drop(columns='_price_eth'), use_container_width=True)
             
             # Additional insights
             col1, col2 = st.columns(2)
             with col1:
                 st.metric("Total Recent Sales", len(recent_sales_df))
             with col2:
-                # Extract numeric prices for average calculation
-                prices = []
-                for price_str in recent_sales_df['Price']:
-                    try:
-                        price = float(price_str.split()[0])
-                        prices.append(price)
-                    except:
-                        continue
+                avg_price = recent_sales_df['_price_eth'].mean()
                 
-                if prices:
-                    avg_price = sum(prices) / len(prices)
+                if not math.isnan(avg_price):
                     st.metric("Average Sale Price", f"{avg_price:.4f} ETH")
         else:
             st.warning("No recent sales data available for this collection.")
@@ -383,49 +664,60 @@ if collection_slug and OPENSEA_API_KEY != "YOUR_OPENSEA_API_KEY":
         if assets:
             st.subheader(f"Showing {len(assets)} NFTs from '{collection_slug}'")
             
-            # Create grid layout
+            # Pull out everything the grid needs once, before rendering
+            rows = [
+                (resolve_ipfs(image_url), nft_name, token_id, traits)
+                for image_url, nft_name, token_id, traits in map(asset_card_fields, assets)
+            ]
+            
+            # Create grid layout: lay out every row first, then fill cells by index
             cols_per_row = 4
-            for i in range(0, len(assets), cols_per_row):
-                cols = st.columns(cols_per_row)
+            grid = [st.columns(cols_per_row) for _ in range(math.ceil(len(rows) / cols_per_row))]
+            
+            # Draw every card right away, leaving an empty slot for its image
+            image_slots = []
+            for idx, (candidate_urls, nft_name, token_id, traits) in enumerate(rows):
+                row, col = divmod(idx, cols_per_row)
+                with grid[row][col]:
+                    image_slots.append(st.empty())
+                    if not candidate_urls:
+                        image_slots[idx].info("🖼️ No image URL")
+                    
+                    # Display basic info
+                    st.caption(f"**{nft_name}**")
+                    st.caption(f"Token ID: {token_id}")
+                    
+                    # Traits expander
+                    with st.expander("View Traits"):
+                        # One markdown element for all traits; trailing double spaces force line breaks
+                        traits_md = "  \n".join(
+                            f"**{trait.get('trait_type', 'Unknown')}:** {trait.get('value', 'Unknown')}"
+                            for trait in traits
+                        )
+                        st.markdown(traits_md or "No traits available")
+            
+            # Fill in each image as its download finishes
+            for idx, image in fetch_images([tuple(candidate_urls) for candidate_urls, *_ in rows]):
+                candidate_urls = rows[idx][0]
+                if not candidate_urls:
+                    continue
                 
-                for j, col in enumerate(cols):
-                    if i + j < len(assets):
-                        nft = assets[i + j]
-                        with col:
-                            # Display NFT image
-                            image_url = nft.get('image_url', '')
-
-                            if image_url:
-                                # Cek apakah ini URL IPFS dan ubah ke HTTP Gateway
-                                if image_url.startswith("ipfs://"):
-                                    ipfs_hash = image_url.replace("ipfs://", "")
-                                    image_url = f"https://ipfs.io/ipfs/{ipfs_hash}"
-
-                                try:
-                                    st.image(image_url, use_column_width=True)
-                                except Exception as e:
-                                    # Tampilkan URL yang gagal di-load untuk debugging
-                                    st.info(f"🖼️ Image not available")
-                                    st.caption(f"Failed URL: {image_url}")
-                                    # st.caption(f"Error: {e}") # Uncomment untuk debug error
-                            else:
-                                st.info("🖼️ No image URL")
-                            
-                            # Display basic info
-                            nft_name = nft.get('name', f"NFT #{nft.get('identifier', 'Unknown')}")
-                            st.caption(f"**{nft_name}**")
-                            st.caption(f"Token ID: {nft.get('identifier', 'Unknown')}")
-                            
-                            # Traits expander
-                            with st.expander("View Traits"):
-                                traits = nft.get('traits', [])
-                                if traits:
-                                    for trait in traits:
-                                        trait_type = trait.get('trait_type', 'Unknown')
-                                        trait_value = trait.get('value', 'Unknown')
-                                        st.write(f"**{trait_type}:** {trait_value}")
-                                else:
-                                    st.write("No traits available")
+                slot = image_slots[idx]
+                if image is not None:
+                    try:
+                        slot.image(image, use_column_width=True)
+                        continue
+                    except Exception:
+                        # Not a raster image we can decode (e.g. SVG); let Streamlit load the URL
+                        pass
+                try:
+                    slot.image(candidate_urls[0], use_column_width=True)
+                except Exception as e:
+                    # Tampilkan URL yang gagal di-load untuk debugging
+                    with slot.container():
+                        st.info(f"🖼️ Image not available")
+                        st.caption(f"Failed URL: {candidate_urls[0]}")
+                        # st.caption(f"Error: {e}") # Uncomment untuk debug error
         else:
             st.warning("No assets available for this collection.")
 